@@ -1,4 +1,5 @@
 import dataclasses
+import functools
 import os
 from dataclasses import dataclass
 from typing import Optional
@@ -19,13 +20,22 @@ class Config:
     WAGE_LAYOUT: Optional[str] = None
 
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def from_env(cls, **kwargs):
-        # need to read in the .env file
-        load_dotenv()
+        # need to read in the .env file, unless the environment already has everything.
+        # N.B. cached, since this is called on every entry point that needs the config
+        names = {
+            field.name: f"{CONFIG_PREFIX}{field.name}"
+            for field in dataclasses.fields(Config)
+            if field.name not in kwargs
+        }
+        if not all(name in os.environ for name in names.values()):
+            load_dotenv()
         for field in dataclasses.fields(Config):
-            if field.name not in kwargs:
-                name = f"{CONFIG_PREFIX}{field.name}"
-                kwargs[field.name] = os.environ.get(name, f"{field} missing in .env")
+            if field.name in names:
+                kwargs[field.name] = os.environ.get(
+                    names[field.name], f"{field} missing in .env"
+                )
 
         return cls(**kwargs)
 
@@ -36,6 +46,13 @@ def set_global_config(config: Optional[Config] = None):
 
 
 def get_global_config() -> Config:
-    if _GLOBAL_CONFIG is None:
-        set_global_config()
-    return _GLOBAL_CONFIG
+    return _GLOBAL_CONFIG or Config.from_env()
+
+
+def reset_global_config():
+    """
+    Forget the global config and the cached environment, e.g., between tests
+    """
+    global _GLOBAL_CONFIG
+    _GLOBAL_CONFIG = None
+    Config.from_env.cache_clear()
@@ -1,74 +1,229 @@
 """Sets of functions exclusively for reading and validating Fixed Width Files from DLT"""
+import csv
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+# N.B. deliberately private: the default NA strings vary between pandas versions, and
+# they need to match those of the installed pd.read_fwf
+from pandas._libs.parsers import STR_NA_VALUES
+
 from .config import get_global_config
 from .types import DatetimeType, FilenameType
 
+# The columns of the layout files
+_LAYOUT_COLUMNS = [
+    "index",
+    "type",
+    "beg_pos",
+    "end_pos",
+    "decimal",
+    "field_name",
+    "byte_size",
+    "description",
+]
+# The only bytes that may appear in a column for it to be parsed as numeric
+_NUMERIC_BYTES = np.frombuffer(b"0123456789+-.eE ", dtype=np.uint8)
+# The strings that pd.read_fwf reads as NaN by default
+_NA_STRINGS = np.array(sorted(STR_NA_VALUES))
+# How far into a weekly file to look for the end of the first line
+_MAX_LINE_LEN = 1 << 16
+
+
+@functools.lru_cache(maxsize=16)
+def _load_layout(layout_filepath: str) -> Tuple[Tuple[int, ...], Tuple[str, ...]]:
+    """
+    Read the field widths and names from a layout file. Cached, since every weekly file
+    of the same kind shares a layout
+    """
+    with open(layout_filepath, newline="", encoding="utf-8") as f:
+        rows = [dict(zip(_LAYOUT_COLUMNS, row)) for row in csv.reader(f) if row]
+    widths = tuple(int(row["byte_size"]) for row in rows)
+    names = tuple(row["field_name"].strip() for row in rows)
+    return widths, names
+
 
 def _read_weekly_data(
-    layout: pd.DataFrame,
+    widths: Sequence[int],
+    names: Sequence[str],
     weekly_filepath: FilenameType = None,
+    strict: bool = False,
 ) -> pd.DataFrame:
     # Verify that the weekly filepath actually exists
     assert Path(weekly_filepath).exists()
-    # Ensure that the column names of layout is correct
-    layout.columns = [
-        "index",
-        "type",
-        "beg_pos",
-        "end_pos",
-        "decimal",
-        "field_name",
-        "byte_size",
-        "description",
-    ]
-
-    # Read weekly
-    data = pd.read_fwf(weekly_filepath, header=None, widths=list(layout.byte_size))
-    data.columns = [col.strip() for col in layout.field_name]
+
+    if strict:
+        # Use pandas' own parser as the reference implementation
+        return _read_weekly_data_with_pandas(weekly_filepath, widths, names)
+
+    # Read weekly. The file is memory mapped so that only the column currently being
+    # parsed is ever copied into memory
+    if Path(weekly_filepath).stat().st_size == 0:
+        raw = np.empty(0, dtype=np.uint8)
+    else:
+        raw = np.memmap(weekly_filepath, dtype=np.uint8, mode="r")
+    if raw.size and raw.max() >= 0x80:
+        # pd.read_fwf cuts fields by character rather than by byte, and the two only
+        # agree for ASCII, so fall back to pandas' (much slower) parser
+        return _read_weekly_data_with_pandas(weekly_filepath, widths, names)
+    records = _split_records(raw, sum(widths))
+    if records is None:
+        # The records are ragged, so fall back to pandas' (much slower) parser
+        return _read_weekly_data_with_pandas(weekly_filepath, widths, names)
+
+    # pd.read_fwf skips lines that are entirely blank, so do the same. Only lines that
+    # start with a space can be blank, which saves comparing every byte of the file
+    maybe_blank = np.flatnonzero(records[:, 0] == ord(" "))
+    blank = maybe_blank[(records[maybe_blank] == ord(" ")).all(axis=1)]
+    rows = np.delete(np.arange(len(records)), blank) if blank.size else slice(None)
+
+    offsets = np.concatenate([[0], np.cumsum(widths)])
+    return pd.DataFrame(
+        {
+            name: _parse_column(records[rows, start:end])
+            for name, start, end in zip(names, offsets[:-1], offsets[1:])
+        }
+    )
+
+
+def _read_weekly_data_with_pandas(
+    weekly_filepath: FilenameType, widths: Sequence[int], names: Sequence[str]
+) -> pd.DataFrame:
+    data = pd.read_fwf(weekly_filepath, header=None, widths=list(widths))
+    data.columns = list(names)
     return data
 
 
+def _split_records(raw: np.ndarray, record_len: int) -> Optional[np.ndarray]:
+    """
+    View the raw bytes of a fixed width file as a 2d array with one row per line
+    (without the line terminator). Nothing is copied. Returns None if the lines of the
+    file are not all the same length.
+    """
+    if not raw.size:
+        return np.empty((0, record_len), dtype=np.uint8)
+
+    # Every line is as long as the first one, line terminator included
+    newlines = np.flatnonzero(raw[:_MAX_LINE_LEN] == ord("\n"))
+    if newlines.size:
+        line_len = int(newlines[0]) + 1
+        terminator_len = 2 if line_len > 1 and raw[line_len - 2] == ord("\r") else 1
+    elif raw.size <= _MAX_LINE_LEN:
+        line_len, terminator_len = raw.size, 0
+    else:
+        return None
+
+    # N.B. the final line may be missing its line terminator
+    if raw.size % line_len not in (0, line_len - terminator_len):
+        return None
+    if line_len - terminator_len < record_len:
+        return None
+    if terminator_len and not (raw[line_len - 1 :: line_len] == ord("\n")).all():
+        return None
+
+    return np.lib.stride_tricks.as_strided(
+        raw,
+        shape=(-(-raw.size // line_len), line_len - terminator_len),
+        strides=(line_len, 1),
+        writeable=False,
+    )
+
+
+def _parse_column(values: np.ndarray) -> pd.Series:
+    """
+    Decode one column of an ASCII fixed width file (a 2d array of bytes with one row
+    per record) and infer its type like pd.read_fwf: int64 if possible, then float64,
+    and otherwise strings, with read_fwf's default NA strings as NaN. Unlike read_fwf,
+    booleans and infinities are left as strings.
+    """
+    strings = np.ascontiguousarray(values).view(f"S{values.shape[1]}").ravel()
+    strings = np.char.strip(strings.astype("U"))
+    is_na = np.isin(strings, _NA_STRINGS)
+    has_na = is_na.any()
+
+    is_numeric = np.isin(values[~is_na] if has_na else values, _NUMERIC_BYTES).all()
+    if is_numeric and not has_na:
+        try:
+            return pd.Series(strings.astype(np.int64))
+        except (OverflowError, ValueError):
+            pass
+    if is_numeric:
+        try:
+            numbers = np.full(len(strings), np.nan)
+            numbers[~is_na] = strings[~is_na].astype(np.float64)
+            return pd.Series(numbers)
+        except ValueError:
+            pass
+    return pd.Series(strings).mask(is_na)
+
+
 def get_weekly_raw_data_dir(dt: Optional[DatetimeType] = None) -> Path:
     if dt is None:
         dt = date.today().strftime("%Y-%m-%d")
     return Path(get_global_config().DATA_DIR) / "raw" / dt
 
 
-def read_all_files(dt: Optional[DatetimeType] = None) -> List[pd.DataFrame]:
+def read_all_files(
+    dt: Optional[DatetimeType] = None, verbose: bool = False
+) -> List[pd.DataFrame]:
     DATA_DIR = get_weekly_raw_data_dir(dt)
     # collect all the file list
     file_list = list(DATA_DIR.glob("*.txt"))
     # sort the file names to ensure that there is some ordering
     file_list.sort()
 
-    # verify that the ordering is as expected
-    print([filename.name.split("_")[0] for filename in file_list])
-    return list(map(read_fwf_file, file_list))
+    if verbose:
+        # verify that the ordering is as expected
+        print([filename.name.split("_")[0] for filename in file_list])
+    if not file_list:
+        return []
+
+    # Resolve the layouts here so that workers don't depend on the global config
+    layout_list = list(map(_get_default_layout_filepath, file_list))
+    # Each file is independent, so parse them in parallel
+    with ProcessPoolExecutor(
+        max_workers=min(len(file_list), os.cpu_count() or 1)
+    ) as executor:
+        return list(executor.map(read_fwf_file, file_list, layout_list))
+
+
+def _get_default_layout_filepath(weekly_filepath: FilenameType) -> Optional[str]:
+    """
+    Take the layout defaults in .env depending on weekly filepath name
+    """
+    layout_filepath = None
+    if "reaext" in Path(weekly_filepath).name.lower():
+        layout_filepath = get_global_config().REAEXT_LAYOUT
+    if "reawage" in Path(weekly_filepath).name.lower():
+        layout_filepath = get_global_config().WAGE_LAYOUT
+    if "reaint420" in Path(weekly_filepath).name.lower():
+        layout_filepath = get_global_config().INT420_LAYOUT
+    if "realedg" in Path(weekly_filepath).name.lower():
+        layout_filepath = get_global_config().LEDGER_LAYOUT
+    return layout_filepath
 
 
 def read_fwf_file(
     weekly_filepath: FilenameType = None,
     layout_filepath: Optional[FilenameType] = None,
+    strict: bool = False,
 ) -> pd.DataFrame:
     """
-    Reading fixed width structured data
+    Reading fixed width structured data. If strict, the file is parsed with pd.read_fwf
+    rather than the faster NumPy-based reader.
     """
     if layout_filepath is None:
         # If no file path is provided, take defaults in .env depending on weekly filepath name
-        if "reaext" in weekly_filepath.name.lower():
-            layout_filepath = get_global_config().REAEXT_LAYOUT
-        if "reawage" in weekly_filepath.name.lower():
-            layout_filepath = get_global_config().WAGE_LAYOUT
-        if "reaint420" in weekly_filepath.name.lower():
-            layout_filepath = get_global_config().INT420_LAYOUT
-        if "realedg" in weekly_filepath.name.lower():
-            layout_filepath = get_global_config().LEDGER_LAYOUT
+        layout_filepath = _get_default_layout_filepath(weekly_filepath)
 
     # Read Layout
-    layout = pd.read_csv(layout_filepath, header=None)
-    return _read_weekly_data(layout=layout, weekly_filepath=weekly_filepath)
+    widths, names = _load_layout(str(layout_filepath))
+    return _read_weekly_data(
+        widths=widths, names=names, weekly_filepath=weekly_filepath, strict=strict
+    )
@@ -4,14 +4,24 @@ import numpy as np
 import pandas as pd
 
 
-def _convert_seed_to_randomstate(
-    seed: Optional[Union[int, np.random.mtrand.RandomState]]
-) -> np.random.mtrand.RandomState:
-    if not seed:
-        return np.random
-    if isinstance(seed, int):
-        return np.random.RandomState(seed)
-    return seed
+def _convert_seed_to_generator(
+    seed: Optional[Union[int, np.random.Generator]]
+) -> np.random.Generator:
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def _draw_bernoulli(random: np.random.Generator, p: float, size: int) -> np.ndarray:
+    """
+    Draw 0/1 outcomes that are 1 with probability p, i.e., `random.binomial(1, p, size)`,
+    by comparing uniform draws against p. This skips the general binomial sampler, and
+    the boolean result is reinterpreted as int8 without a copy. Like `binomial`, raises
+    a ValueError if p is not in [0, 1].
+    """
+    if not 0 <= p <= 1:
+        raise ValueError(f"p must be in [0, 1], not {p}")
+    return (random.random(size) < p).view(np.int8)
 
 
 def gen_annual_income(
@@ -22,12 +32,12 @@ def gen_annual_income(
     inc_treatment_std: int = 5_000,
     number_of_weeks: int = 13,
     number_treat_per_week: int = 150,
-    seed: Optional[Union[int, np.random.mtrand.RandomState]] = 189389,
+    seed: Optional[Union[int, np.random.Generator]] = 189389,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Generates annual income before and after RESEA intervention according to a normal
-    distribution using `np.random.randn`. The initial_value is used in generating
-    outcome_value to ensure some correlation.
+    distribution using `np.random.Generator.standard_normal`. The initial_value is used
+    in generating outcome_value to ensure some correlation.
 
     Args:
         number_control_per_week: a single number if control does not vary weekly.
@@ -47,41 +57,51 @@ def gen_annual_income(
 
     Returns: treated_df, control_df
     """
-    random = _convert_seed_to_randomstate(seed)
+    random = _convert_seed_to_generator(seed)
 
     # Define the effect
     inc_treatment_effect = inc_base_rate * effect_size
 
-    inc_initial_value_of_treated = (
-        random.randn(number_of_weeks * number_treat_per_week) * inc_base_std
-        + inc_base_rate
-    )
-    inc_outcome_value_of_treated = (
-        inc_initial_value_of_treated
-        + random.randn(number_of_weeks * number_treat_per_week) * inc_treatment_std
-        + inc_treatment_effect
+    # Draw every normal variate at once and carve the draws into views, one per
+    # series, so the affine transforms below can be applied in place
+    number_treated = number_of_weeks * number_treat_per_week
+    number_control = number_of_weeks * number_control_per_week
+    (
+        inc_initial_value_of_treated,
+        inc_outcome_value_of_treated,
+        inc_initial_value_of_control,
+        inc_outcome_value_of_control,
+    ) = np.split(
+        random.standard_normal(2 * number_treated + 2 * number_control),
+        np.cumsum([number_treated, number_treated, number_control]),
     )
 
-    inc_initial_value_of_control = (
-        random.randn(number_of_weeks * number_control_per_week) * inc_base_std
-        + inc_base_rate
-    )
+    inc_initial_value_of_treated *= inc_base_std
+    inc_initial_value_of_treated += inc_base_rate
+
+    inc_outcome_value_of_treated *= inc_treatment_std
+    inc_outcome_value_of_treated += inc_initial_value_of_treated
+    inc_outcome_value_of_treated += inc_treatment_effect
+
+    inc_initial_value_of_control *= inc_base_std
+    inc_initial_value_of_control += inc_base_rate
+
+    inc_outcome_value_of_control *= inc_base_std
+    inc_outcome_value_of_control += inc_base_rate
 
-    inc_outcome_value_of_control = (
-        random.randn(number_of_weeks * number_control_per_week) * inc_base_std
-        + inc_base_rate
-    )
     control_df = pd.DataFrame(
         {
             "inc_initial": inc_initial_value_of_control,
             "inc_outcome": inc_outcome_value_of_control,
-        }
+        },
+        copy=False,
     )
     treated_df = pd.DataFrame(
         {
             "inc_initial": inc_initial_value_of_treated,
             "inc_outcome": inc_outcome_value_of_treated,
-        }
+        },
+        copy=False,
     )
     return treated_df, control_df
 
@@ -92,12 +112,12 @@ def gen_employment(
     emp_base_rate: float = 0.62,
     number_of_weeks: int = 13,
     number_treat_per_week=150,
-    seed: Optional[Union[int, np.random.mtrand.RandomState]] = 189389,
+    seed: Optional[Union[int, np.random.Generator]] = 189389,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Generates employment outcomes after RESEA intervention according to a binomial
-    distribution using `np.random.binomial`. Input for binomial distribution is
-    determined by `effect_size` and `emp_base_rate` variables.
+    distribution with a single trial (see `_draw_bernoulli`). Input for binomial
+    distribution is determined by `effect_size` and `emp_base_rate` variables.
 
     Args:
         number_control_per_week: a single number if control does not vary weekly.
@@ -115,28 +135,28 @@ def gen_employment(
 
     Returns: treated_df, control_df
     """
-    random = _convert_seed_to_randomstate(seed)
+    random = _convert_seed_to_generator(seed)
 
     # the amount we expect incrased
     emp_treatment_effect = float(emp_base_rate * (1 + effect_size))
 
     try:
-        emp_outcome_value_of_treated = random.binomial(
-            1, emp_treatment_effect, size=number_of_weeks * number_treat_per_week
+        emp_outcome_value_of_treated = _draw_bernoulli(
+            random, emp_treatment_effect, size=number_of_weeks * number_treat_per_week
         )
     except ValueError:
         print(f"error at {emp_treatment_effect}")
     try:
-        emp_outcome_value_of_control = random.binomial(
-            1,
+        emp_outcome_value_of_control = _draw_bernoulli(
+            random,
             emp_base_rate,
             size=number_of_weeks * number_control_per_week,
         )
     except ValueError:
         print(f"error at {emp_base_rate}")
 
-    treated_df = pd.DataFrame({"employment": emp_outcome_value_of_treated})
-    control_df = pd.DataFrame({"employment": emp_outcome_value_of_control})
+    treated_df = pd.DataFrame({"employment": emp_outcome_value_of_treated}, copy=False)
+    control_df = pd.DataFrame({"employment": emp_outcome_value_of_control}, copy=False)
     return treated_df, control_df
 
 
@@ -148,7 +168,7 @@ def gen_pay_ratio(
     distribution: str = "exponential",
     number_of_weeks: int = 13,
     number_treat_per_week=150,
-    seed: Optional[Union[int, np.random.mtrand.RandomState]] = 189389,
+    seed: Optional[Union[int, np.random.Generator]] = 189389,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Generates pay ratio outcomes after RESEA intervention according to a distribution.
@@ -173,7 +193,7 @@ def gen_pay_ratio(
 
     Returns: treated_df, control_df
     """
-    random = _convert_seed_to_randomstate(seed)
+    random = _convert_seed_to_generator(seed)
 
     if distribution == "exponential":
         pay_ratio_outcome_value_of_treated = (
@@ -208,8 +228,12 @@ def gen_pay_ratio(
             f"distribution must be one of 'pareto' or 'exponential', not {distribution}"
         )
 
-    treated_df = pd.DataFrame({"pay_ratio": pay_ratio_outcome_value_of_treated})
-    control_df = pd.DataFrame({"pay_ratio": pay_ratio_outcome_value_of_control})
+    treated_df = pd.DataFrame(
+        {"pay_ratio": pay_ratio_outcome_value_of_treated}, copy=False
+    )
+    control_df = pd.DataFrame(
+        {"pay_ratio": pay_ratio_outcome_value_of_control}, copy=False
+    )
     return treated_df, control_df
 
 
@@ -220,12 +244,12 @@ def gen_weeks_on_unemployment(
     number_of_quarters: int = 6,
     number_of_weeks: int = 13,
     number_treat_per_week: int = 150,
-    seed: Optional[Union[int, np.random.mtrand.RandomState]] = 189389,
+    seed: Optional[Union[int, np.random.Generator]] = 189389,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Generates weeks of unemployment after RESEA intervention according to a exponential
-    distribution using `np.random.exponential`. Input for exponential distribution is
-    determined by `qt_unemp_lambda` and `number_of_quarters` variables.
+    distribution using `np.random.Generator.exponential`. Input for exponential
+    distribution is determined by `qt_unemp_lambda` and `number_of_quarters` variables.
 
     Args:
         number_control_per_week: a single number if control does not vary weekly. List of int otherwise
@@ -241,7 +265,7 @@ def gen_weeks_on_unemployment(
     Returns: treated_df, control_df
 
     """
-    random = _convert_seed_to_randomstate(seed)
+    random = _convert_seed_to_generator(seed)
 
     # attempt to estimate this as exponential distribution,
     # because the event can be modeled as the time between occurrances
@@ -253,8 +277,8 @@ def gen_weeks_on_unemployment(
     unemp_outcome_value_of_control = random.exponential(
         unemp_lambda, size=number_of_weeks * number_control_per_week
     )
-    treated_df = pd.DataFrame({"wks_unemp": unemp_outcome_value_of_treat})
-    control_df = pd.DataFrame({"wks_unemp": unemp_outcome_value_of_control})
+    treated_df = pd.DataFrame({"wks_unemp": unemp_outcome_value_of_treat}, copy=False)
+    control_df = pd.DataFrame({"wks_unemp": unemp_outcome_value_of_control}, copy=False)
     return treated_df, control_df
 
 
@@ -266,11 +290,11 @@ def gen_cohorts(
     """
     N.B. alters df in place and also returns it
     """
-    if is_treated:
-        df["cohort"] = np.arange(len(df), dtype=int) // cohort_unit
-        df["is_treated"] = True
-    else:
-        df["cohort"] = np.arange(len(df), dtype=int) // cohort_unit
-        df["is_treated"] = False
+    # Each cohort is cohort_unit consecutive rows, with a possibly short last cohort
+    n_cohorts = -(-len(df) // cohort_unit)
+    df["cohort"] = np.repeat(np.arange(n_cohorts, dtype=np.int32), cohort_unit)[
+        : len(df)
+    ]
+    df["is_treated"] = np.full(len(df), is_treated, dtype=bool)
     ### Alternatively, this is where we implement the reduction if we want weekly variation
     return df
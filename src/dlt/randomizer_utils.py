@@ -1,29 +1,40 @@
-import decimal
 import math
 import warnings
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from decimal import Decimal, localcontext
-from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
 from pathlib import Path
 from time import time
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
-from tqdm.notebook import tqdm
 
 from .config import get_global_config
 from .types import FilenameType
 
+try:
+    # picks a notebook or console progress bar, whichever fits where we're running
+    from tqdm.auto import tqdm
+except ImportError:
 
-def python_hash(SSN: int) -> int:
+    def tqdm(iterable, **kwargs):
+        return iterable
+
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def python_hash_vec(SSNs: np.ndarray) -> np.ndarray:
     """
-    A pythonic implementation of COBOL code using floating-point arithmetic. Note that
-    this will differ ever-so-slightly from the cobol_hash due to the differing rounding
-    conventions.
+    A vectorized version of python_hash operating on an array of SSNs at once. Each
+    step of the COBOL code becomes a single NumPy operation over the whole array,
+    which avoids the per-SSN Python overhead when hashing large pools.
     """
     # Constants determined by DoIT
-    L_SD = SSN
+    L_SD = np.asarray(SSNs, dtype=np.int64)
     C_Q = 127773  # 3^2 * 14197
     C_A = 16807  # 7^5
     C_R = 2836  # 2^2 * 709
@@ -49,46 +60,125 @@ def python_hash(SSN: int) -> int:
     # We also note that the _smallest negative_ value that C_A * W_LO - C_R * W_HI can
     # achieve in theory is -1 (since C_A and C_R are coprime) but I haven't done the
     # computation to determine whether it's actually possible in this range of numbers
-    if L_SD <= 0:
+    is_negative = L_SD <= 0
+    if is_negative.any():
         warnings.warn("L_SD is negative")
-        L_SD += C_M
+    L_SD += is_negative * C_M
 
     # And so by the above comment, L_RAND is in [0, 1) and this rounding gives us the
-    # top 10 digits of the mantissa
-    L_RAND = math.floor(L_SD / C_M * 1e10) / 1e10
+    # top 10 digits of the mantissa. N.B. the operations are kept in the same order as
+    # the scalar version so that results are bit-for-bit identical.
+    L_RAND = np.floor(L_SD / C_M * 1e10) / 1e10
 
     return L_RAND
 
 
-def cobol_hash(SSN: int) -> float:
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True, boundscheck=False)
+    def _python_hash_numba(out: np.ndarray, SSNs: np.ndarray):
+        """
+        The same computation as python_hash_vec fused into a single compiled pass
+        over the SSNs, so that no intermediate arrays are allocated. Results are
+        written into `out`.
+        """
+        for i in numba.prange(SSNs.size):
+            L_SD = SSNs[i]
+            W_HI = L_SD // 127773
+            W_LO = L_SD - W_HI * 127773
+            L_SD = 16807 * W_LO - 2836 * W_HI
+            if L_SD <= 0:
+                L_SD += 2147483647
+            out[i] = math.floor(L_SD / 2147483647 * 1e10) / 1e10
+
+
+def _python_hash_batch(SSNs: np.ndarray) -> np.ndarray:
+    """
+    Hash a whole pool of SSNs with the numba kernel if numba is installed, falling
+    back to python_hash_vec otherwise. N.B. with numba's TBB threading layer, forking
+    worker processes after this has run (e.g., generate_outcomes with n_workers > 1 or
+    generate_all_L_RAND) can hang. Set NUMBA_THREADING_LAYER to workqueue or omp if so.
+    """
+    SSNs = np.ascontiguousarray(SSNs, dtype=np.int64)
+    if numba is None:
+        return python_hash_vec(SSNs)
+    out = np.empty(len(SSNs), dtype=np.float64)
+    _python_hash_numba(out, SSNs)
+    return out
+
+
+def python_hash(SSN: int) -> float:
+    """
+    A pythonic implementation of COBOL code using floating-point arithmetic. Note that
+    this will differ ever-so-slightly from the cobol_hash due to the differing rounding
+    conventions.
+    """
+    return float(python_hash_vec(np.array([SSN]))[0])
+
+
+def cobol_hash(SSN: int) -> Decimal:
+    """
+    A python implementation of COBOL's fixed-point arithmetic. Every intermediate value
+    is an integer, so the computation is done exactly with Python ints and only the
+    result is converted to a Decimal. Note that quantizing L_SD / C_M to 1E-10 with
+    ROUND_DOWN is the same as the integer division L_SD * 10^10 // C_M.
+    """
+    # Constants determined by DoIT
+    L_SD = int(SSN)
+    C_A = 16807
+    C_M = 2147483647
+    C_Q = 127773
+    C_R = 2836
+
+    # Translated
+    W_HI = L_SD // C_Q
+    W_LO = L_SD - C_Q * W_HI  # L_SD % C_Q
+    L_SD = C_A * W_LO - C_R * W_HI
+
+    if L_SD <= 0:
+        L_SD += C_M
+    L_RAND_WHOLE = L_SD * 10_000_000_000 // C_M
+
+    if L_RAND_WHOLE == 0:
+        warnings.warn("L_RAND is zero")
+
+    return Decimal(L_RAND_WHOLE).scaleb(-10)
+
+
+def cobol_hash_vec(SSNs: np.ndarray) -> np.ndarray:
     """
-    A python implementation of COBOL's fixed-point arithmetic
+    A vectorized version of cobol_hash using exact int64 arithmetic. Returns the top 10
+    digits of L_RAND as integers (i.e., L_RAND * 10^10) since floats cannot represent
+    the fixed-point result exactly.
     """
-    with localcontext() as ctx:
-        # Constants determined by DoIT
-        ctx.prec = 10
-        ctx.rounding = decimal.ROUND_DOWN
+    # Constants determined by DoIT
+    L_SD = np.asarray(SSNs, dtype=np.int64)
+    C_A = 16807
+    C_M = 2147483647
+    C_Q = 127773
+    C_R = 2836
+
+    # Translated
+    W_HI = L_SD // C_Q
+    W_LO = L_SD - C_Q * W_HI  # L_SD % C_Q
+    L_SD = C_A * W_LO - C_R * W_HI
+    L_SD += (L_SD <= 0) * C_M
 
-        L_SD = Decimal(SSN)
-        C_A = Decimal("0000016807")
-        C_M = Decimal("2147483647")
-        C_Q = Decimal("0000127773")
-        C_R = Decimal("0000002836")
+    # L_SD * 10^10 can overflow int64, so do the long division in two steps of 10^5
+    quotient, remainder = np.divmod(L_SD * 100_000, C_M)
+    L_RAND_WHOLE = quotient * 100_000 + remainder * 100_000 // C_M
 
-        # Translated
-        W_HI = (L_SD / C_Q).quantize(Decimal("1E0"))  # L_SD // C_Q
-        W_LO = L_SD - C_Q * W_HI  # L_SD % C_Q
-        L_SD = C_A * W_LO - C_R * W_HI
+    if (L_RAND_WHOLE == 0).any():
+        warnings.warn("L_RAND is zero")
 
-        if L_SD <= 0:
-            L_SD += C_M
-        L_RAND = (L_SD / C_M).quantize(Decimal("1E-10"))
+    return L_RAND_WHOLE
 
-        if L_RAND == 0:
-            warnings.warn("L_RAND is zero")
-            L_SD += C_M
 
-        return L_RAND
+def _cobol_hash_chunk(SSNs: np.ndarray) -> List[Decimal]:
+    """
+    Apply cobol_hash to a chunk of SSNs. Used as the unit of work for worker processes.
+    """
+    return [cobol_hash(ssn) for ssn in SSNs]
 
 
 def generate_outcomes(
@@ -99,42 +189,62 @@ def generate_outcomes(
     size: Optional[int] = None,
     all_values: Optional[bool] = False,
     generate_rand_whole: Optional[bool] = False,
+    n_workers: int = 1,
+    sort_pool: bool = False,
 ) -> pd.DataFrame:
     """
     Helper function that generates L_RAND outcomes with the option for pythonic or cobol implmentations.
+    Integer SSNs are hashed with cobol_hash_vec, in which case L_RAND_WHOLE is exact. Any other
+    SSNs (e.g., zero-padded strings) are passed to cobol_hash one at a time, split into one chunk of
+    SSNs per worker process if n_workers > 1. N.B. n_workers only applies to such non-integer
+    pools of the cobol process type; integer pools, including those sampled from low and high,
+    are always hashed in a single vectorized call. A randomly sampled pool is only sorted if
+    sort_pool is set.
     """
-    # Generate a random sample of SSNs to test, and sort to verify monotonicity of relationship
+    # Generate a random sample of SSNs to test, optionally sorted to check monotonicity
     if input_list is not None:
-        ssn_pool = input_list
+        ssn_pool = np.asarray(input_list)
     elif not all_values:
         # Setting seed to ensure replicability
         np.random.seed(0)
         ssn_pool = np.random.randint(low=low, high=high, size=size)
-        ssn_pool.sort()
+        if sort_pool:
+            ssn_pool.sort()
     elif all_values:
         ssn_pool = np.arange(low, high)
 
     # apply random number generator to SSN pool
+    L_RAND_WHOLE = None
     if process_type == "python":
-        with ThreadPoolExecutor() as executor:
-            ssn_outcomes = list(
-                tqdm(executor.map(python_hash, ssn_pool), total=len(ssn_pool))
-            )
+        ssn_outcomes = _python_hash_batch(ssn_pool)
 
     if process_type == "cobol":
-        with ThreadPoolExecutor() as executor:
-            ssn_outcomes = list(
-                tqdm(
-                    executor.map(cobol_hash, ssn_pool.astype(str)), total=len(ssn_pool)
-                )
-            )
-
-    df = pd.DataFrame(ssn_outcomes, columns=["L_RAND"])
-    final_df = pd.concat([pd.Series(ssn_pool, name="SSN"), df], axis=1)
+        if np.issubdtype(ssn_pool.dtype, np.integer):
+            # The exact integer kernel gives us the digits of L_RAND directly
+            L_RAND_WHOLE = cobol_hash_vec(ssn_pool)
+            ssn_outcomes = L_RAND_WHOLE / 10_000_000_000
+        elif n_workers > 1:
+            # decimal arithmetic holds the GIL, so parallelism has to come from processes
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                ssn_outcomes = [
+                    L_RAND
+                    for chunk in executor.map(
+                        _cobol_hash_chunk, np.array_split(ssn_pool, n_workers)
+                    )
+                    for L_RAND in chunk
+                ]
+        else:
+            ssn_outcomes = [cobol_hash(ssn) for ssn in tqdm(ssn_pool)]
+
+    # Build the frame in one go from the arrays rather than concatenating and then
+    # assigning columns
+    columns = {"SSN": ssn_pool, "L_RAND": np.asarray(ssn_outcomes)}
     if generate_rand_whole:
-        final_df["L_RAND_WHOLE"] = final_df["L_RAND"] * 10_000_000_000
+        if L_RAND_WHOLE is None:
+            L_RAND_WHOLE = columns["L_RAND"] * 10_000_000_000
+        columns["L_RAND_WHOLE"] = L_RAND_WHOLE
 
-    return final_df
+    return pd.DataFrame(columns, copy=False)
 
 
 def chunk_using_generators(lst, n):
@@ -142,6 +252,17 @@ def chunk_using_generators(lst, n):
         yield lst[i : i + n]
 
 
+def _generate_outcomes_range(bounds: Tuple[int, int]) -> pd.DataFrame:
+    """
+    Cobol L_RAND outcomes for the SSNs in [start, stop), so that a worker process only
+    needs to be sent the two bounds rather than a pickled array of SSNs
+    """
+    start, stop = bounds
+    return generate_outcomes(
+        low=start, high=stop, all_values=True, process_type="cobol"
+    )
+
+
 def generate_all_L_RAND(
     filepath: Optional[FilenameType] = None,
     filename: FilenameType = "ssn_output.csv.gz",
@@ -158,24 +279,27 @@ def generate_all_L_RAND(
         # default to the DATA_DIR / reference
         filepath = Path(get_global_config().DATA_DIR) / "reference"
 
-    # Total list of valid SSNs
-    list_of_ssn = np.arange(ssn_min, ssn_max)
-    # Divide the total list into manageable chunks
-    list_of_list_of_ssn = list(chunk_using_generators(list_of_ssn, chunksize))
-    # Process each list using COBOL
+    # Divide the total range of valid SSNs into manageable chunks
+    ranges = [
+        (start, min(start + chunksize, ssn_max))
+        for start in range(ssn_min, ssn_max, chunksize)
+    ]
+    # Process each chunk using COBOL
     with ProcessPoolExecutor() as executor:
         ssn_outcomes = list(
-            tqdm(
-                executor.map(generate_outcomes, list_of_list_of_ssn, repeat("cobol")),
-                total=len(list_of_list_of_ssn),
-            )
+            tqdm(executor.map(_generate_outcomes_range, ranges), total=len(ranges))
         )
 
+    # Stitch the chunks together as plain arrays and sort once, rather than
+    # concatenating, sorting and reindexing whole DataFrames, each of which copies
+    ssns = np.concatenate([df["SSN"].to_numpy() for df in ssn_outcomes])
+    l_rands = np.concatenate([df["L_RAND"].to_numpy() for df in ssn_outcomes])
+    del ssn_outcomes
+    order = np.argsort(l_rands, kind="stable")[::-1]
+
     # Output data into a gzip dataframe.
-    pd.DataFrame(pd.concat(ssn_outcomes)).sort_values(
-        by="L_RAND", ascending=False
-    ).reset_index(drop=True).to_csv(
-        filepath / filename, compression="gzip", index=False
+    pd.DataFrame({"SSN": ssns[order], "L_RAND": l_rands[order]}, copy=False).to_csv(
+        filepath / filename, compression="gzip", index=False, float_format="%.10f"
     )
 
 
@@ -185,4 +309,13 @@ def add_ms_to_seed(ssn: int, ms: int = None):
     """
     if ms is None:
         ms = int(round(time(), 6) * 1e6) % 1_000_000
-    return int(str(ssn + ms)[::-1])
+
+    # Reverse the digits of ssn + ms arithmetically rather than through a string
+    seed = int(ssn + ms)
+    if seed < 0:
+        raise ValueError(f"Cannot reverse the digits of a negative seed: {seed}")
+    reversed_seed = 0
+    while seed:
+        seed, digit = divmod(seed, 10)
+        reversed_seed = reversed_seed * 10 + digit
+    return reversed_seed
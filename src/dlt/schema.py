@@ -5,24 +5,22 @@ from pandera import Check, Column, DataFrameSchema
 
 @extensions.register_check_method(
     statistics=["val"],
-    check_type="element_wise",
 )
-def date_length(element, *, val):
+def date_length(series, *, val):
     """
-    Element-wise check of value lengths
+    Vectorized check of value lengths
     """
-    return len(element) == val
+    return series.str.len() == val
 
 
 @extensions.register_check_method(
-    statistics=["val"],
-    check_type="element_wise",
+    statistics=["min_value", "max_value"],
 )
-def ssn_length(element, *, min_value, max_value):
+def ssn_length(series, *, min_value, max_value):
     """
-    Element-wise check of values between min_value and max_value
+    Vectorized check of values between min_value and max_value
     """
-    return (min_value <= element) & (element <= max_value)
+    return series.between(min_value, max_value)
 
 
 # Establish a schema of the most commonly shared cells.
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from dlt import fwf_helper as fwf
+
+WIDTHS = [9, 5]
+NAMES = ["SSN", "NAME"]
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        pytest.param(b"123456789JOHN \n987654321MARY \n", id="lf"),
+        pytest.param(b"123456789JOHN \r\n987654321MARY \r\n", id="crlf"),
+        pytest.param(b"123456789JOHN \n987654321MARY ", id="no-final-newline"),
+        pytest.param(b"123456789JOHN\n987654321MARY \n", id="ragged"),
+        pytest.param(b"   456789JOHN \n987654321     \n", id="blank-padded"),
+        pytest.param(b"      12 JOHN \n          MARY\n", id="blank-numeric"),
+        pytest.param(b"123456789JOHN \n              \n987654321MARY \n", id="blank"),
+        pytest.param(b"123456789NA   \n987654321null \n", id="na-strings"),
+        pytest.param(b"       NA JOHN \n987654321MARY \n", id="na-numeric"),
+        pytest.param(b"123456789\xc3\x89MILE\n987654321MARY \n", id="non-ascii"),
+        pytest.param(
+            b"123456789ABCD\xc3\x89\n987654321MARY \n", id="non-ascii-boundary"
+        ),
+    ],
+)
+def test_read_weekly_data(tmp_path, contents):
+    """
+    Verify the NumPy-based reader agrees with pd.read_fwf
+    """
+    weekly_filepath = tmp_path / "weekly.txt"
+    weekly_filepath.write_bytes(contents)
+
+    pd.testing.assert_frame_equal(
+        fwf._read_weekly_data(WIDTHS, NAMES, weekly_filepath),
+        fwf._read_weekly_data(WIDTHS, NAMES, weekly_filepath, strict=True),
+    )
+
+
+def test_read_weekly_data_empty(tmp_path):
+    """
+    Unlike pd.read_fwf, which raises an EmptyDataError, an empty file gives an empty
+    DataFrame with the layout's columns
+    """
+    weekly_filepath = tmp_path / "weekly.txt"
+    weekly_filepath.write_bytes(b"")
+
+    data = fwf._read_weekly_data(WIDTHS, NAMES, weekly_filepath)
+    assert data.empty
+    assert list(data.columns) == NAMES
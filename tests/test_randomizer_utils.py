@@ -21,6 +21,29 @@ def test_python_hash():
     assert ran.python_hash(input_ssn) == expected_L_RAND
 
 
+def test_python_hash_vec(random):
+    """
+    Verify the vectorized python_hash agrees with the scalar version
+    """
+    input_ssn = random.integers(low=1_01_0001, high=999_999_999, size=100)
+
+    np.testing.assert_array_equal(
+        ran.python_hash_vec(input_ssn), [ran.python_hash(ssn) for ssn in input_ssn]
+    )
+
+
+def test_python_hash_batch(random):
+    """
+    Verify the batched python_hash (the numba kernel, if installed) is bit-for-bit
+    identical to the vectorized version
+    """
+    input_ssn = random.integers(low=1_01_0001, high=999_999_999, size=100)
+
+    np.testing.assert_array_equal(
+        ran._python_hash_batch(input_ssn), ran.python_hash_vec(input_ssn)
+    )
+
+
 def test_cobol_hash():
     """
     Examine the basic functionalities of cobol_hash
@@ -31,6 +54,18 @@ def test_cobol_hash():
     assert ran.cobol_hash(input_ssn) == expected_L_RAND
 
 
+def test_cobol_hash_vec(random):
+    """
+    Verify the vectorized cobol_hash returns exactly the digits of the scalar version
+    """
+    input_ssn = random.integers(low=1_01_0001, high=999_999_999, size=100)
+
+    np.testing.assert_array_equal(
+        ran.cobol_hash_vec(input_ssn),
+        [int(ran.cobol_hash(ssn).scaleb(10)) for ssn in input_ssn],
+    )
+
+
 def test_generate_outcomes():
     """
     Verify the outcomes generated by the cobol algorithm and python algorithm are equal to each other within an absolute range of 1.
@@ -70,3 +105,11 @@ def test_add_ms_to_seed():
         desired=[int(seed[-3:][::-1]) for seed in new_seed],
         atol=2,
     )
+
+
+def test_add_ms_to_seed_negative():
+    """
+    Ensure that a negative seed is rejected rather than reversed
+    """
+    with pytest.raises(ValueError):
+        ran.add_ms_to_seed(-5, 0)